@@ -0,0 +1,252 @@
+"""
+SerenityAI Emotion Analytics Engine
+Vectorized (NumPy) analysis of a user's emotion timeline
+
+Computes the numbers behind the `influences` and `correlates_with` edges
+defined in models.jac:
+- Emotion transition matrix (what tends to follow what)
+- Daily emotion correlations (correlates_with) and lagged correlations (influences)
+- Intensity profile by hour of day and day of week
+- Trigger co-occurrence and trigger -> emotion correlations
+
+Results are deterministic and plain JSON, so they can be merged straight
+into the TrendAnalyzer report.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Emotion vocabulary (matches MoodLogger colors / Emotion node)
+EMOTIONS = ["happy", "sad", "anxious", "calm", "angry", "neutral"]
+EMOTION_INDEX = {name: i for i, name in enumerate(EMOTIONS)}
+NEGATIVE_CODES = [EMOTION_INDEX[name] for name in ("sad", "anxious", "angry")]
+POSITIVE_CODES = [EMOTION_INDEX[name] for name in ("happy", "calm")]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# 1970-01-01 was a Thursday (Monday = 0)
+_EPOCH_WEEKDAY = 3
+
+
+# =====================================================
+# TIMELINE -> DENSE ARRAYS
+# =====================================================
+
+def timeline_arrays(emotions: list) -> dict:
+    """Convert emotion nodes into dense, time-sorted arrays.
+
+    Entries with an unknown emotion name are mapped to "neutral"; entries
+    with an unparseable timestamp are dropped.
+    """
+    codes, intensity, stamps, triggers = [], [], [], []
+    for e in emotions:
+        try:
+            stamp = np.datetime64(str(e.get("timestamp", ""))[:26], "us")
+        except ValueError:
+            continue
+        if np.isnat(stamp):
+            continue
+        stamps.append(stamp)
+        codes.append(EMOTION_INDEX.get(str(e.get("name", "neutral")).lower(), EMOTION_INDEX["neutral"]))
+        intensity.append(e.get("intensity", 5))
+        # Triggers come from LLM JSON; a bare string would split into letters
+        raw = e.get("triggers")
+        triggers.append([str(t).strip().lower() for t in raw if str(t).strip()] if isinstance(raw, list) else [])
+
+    timestamps = np.array(stamps, dtype="datetime64[us]")
+    order = np.argsort(timestamps, kind="stable")
+    timestamps = timestamps[order]
+    days = timestamps.astype("datetime64[D]")
+
+    return {
+        "codes": np.array(codes, dtype=np.int64)[order],
+        "intensity": np.clip(np.array(intensity, dtype=np.float64), 1, 10)[order],
+        "timestamps": timestamps,
+        "day": (days - days[0]).astype(np.int64) if len(days) else np.zeros(0, dtype=np.int64),
+        "hour": (timestamps.astype("datetime64[h]") - days).astype(np.int64),
+        "weekday": (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7,
+        "triggers": [triggers[i] for i in order],
+    }
+
+
+# =====================================================
+# VECTORIZED KERNELS
+# =====================================================
+
+def transition_matrix(codes: np.ndarray, k: int = len(EMOTIONS)) -> tuple:
+    """Count and row-normalize consecutive emotion transitions (k x k)."""
+    if len(codes) < 2:
+        counts = np.zeros((k, k), dtype=np.int64)
+    else:
+        counts = np.bincount(codes[:-1] * k + codes[1:], minlength=k * k).reshape(k, k)
+    totals = counts.sum(axis=1, keepdims=True)
+    probs = np.divide(counts, totals, out=np.zeros((k, k)), where=totals > 0)
+    return counts, probs
+
+
+def daily_matrix(day: np.ndarray, codes: np.ndarray, intensity: np.ndarray, k: int = len(EMOTIONS)) -> np.ndarray:
+    """Sum of intensity per (day, emotion); days with no entries stay at 0."""
+    n_days = int(day[-1]) + 1 if len(day) else 0
+    daily = np.zeros((n_days, k))
+    np.add.at(daily, (day, codes), intensity)
+    return daily
+
+
+def _column_corr(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pearson correlation between every column of a and every column of b.
+
+    Constant columns have no defined correlation and are reported as 0.
+    """
+    a = a - a.mean(axis=0)
+    b = b - b.mean(axis=0)
+    norm = np.outer(np.sqrt((a * a).sum(axis=0)), np.sqrt((b * b).sum(axis=0)))
+    return np.divide(a.T @ b, norm, out=np.zeros(norm.shape), where=norm > 0)
+
+
+def lagged_correlations(daily: np.ndarray, max_lag: int = 3) -> np.ndarray:
+    """Correlation of emotion i on day t with emotion j on day t + lag.
+
+    Returns an array of shape (max_lag + 1, k, k); lag 0 is the same-day
+    correlation. Lags that leave fewer than 3 overlapping days are 0.
+    """
+    k = daily.shape[1]
+    out = np.zeros((max_lag + 1, k, k))
+    for lag in range(max_lag + 1):
+        if daily.shape[0] - lag < 3:
+            break
+        out[lag] = _column_corr(daily[: daily.shape[0] - lag], daily[lag:])
+    return out
+
+
+def intensity_profile(bucket: np.ndarray, intensity: np.ndarray, size: int) -> tuple:
+    """Entry count and mean intensity per bucket (hour or weekday)."""
+    counts = np.bincount(bucket, minlength=size)
+    sums = np.bincount(bucket, weights=intensity, minlength=size)
+    means = np.divide(sums, counts, out=np.zeros(size), where=counts > 0)
+    return counts, means
+
+
+def trigger_matrices(triggers: list, codes: np.ndarray, k: int = len(EMOTIONS)) -> tuple:
+    """Trigger vocabulary, trigger x trigger co-occurrence and trigger x emotion counts."""
+    vocab = sorted({t for entry in triggers for t in entry})
+    if not vocab:
+        return vocab, np.zeros((0, 0), dtype=np.int64), np.zeros((0, k), dtype=np.int64)
+
+    index = {t: i for i, t in enumerate(vocab)}
+    rows = np.array([r for r, entry in enumerate(triggers) for t in set(entry)], dtype=np.int64)
+    cols = np.array([index[t] for entry in triggers for t in set(entry)], dtype=np.int64)
+    incidence = np.zeros((len(triggers), len(vocab)), dtype=np.int64)
+    incidence[rows, cols] = 1
+
+    cooccurrence = incidence.T @ incidence
+    onehot = np.eye(k, dtype=np.int64)[codes]
+    return vocab, cooccurrence, incidence.T @ onehot
+
+
+# =====================================================
+# FULL ANALYSIS
+# =====================================================
+
+def _edges(matrix: np.ndarray, key: str, threshold: float, symmetric: bool = False) -> list:
+    """List significant off-diagonal emotion pairs, strongest first."""
+    mask = np.triu(np.ones(matrix.shape, dtype=bool), 1) if symmetric else ~np.eye(len(EMOTIONS), dtype=bool)
+    src, dst = np.nonzero((np.abs(matrix) >= threshold) & mask)
+    edges = [{"from": EMOTIONS[i], "to": EMOTIONS[j], key: round(float(matrix[i, j]), 3)} for i, j in zip(src, dst)]
+    return sorted(edges, key=lambda edge: -abs(edge[key]))
+
+
+def analyze_timeline(emotions: list, max_lag: int = 3, threshold: float = 0.3) -> dict:
+    """Run every analysis over a user's emotion timeline.
+
+    Returns JSON-safe numbers only; empty timelines yield zeroed results.
+    """
+    arrays = timeline_arrays(emotions)
+    codes, intensity = arrays["codes"], arrays["intensity"]
+
+    counts, probs = transition_matrix(codes)
+    daily = daily_matrix(arrays["day"], codes, intensity)
+    lagged = lagged_correlations(daily, max_lag)
+    hour_counts, hour_means = intensity_profile(arrays["hour"], intensity, 24)
+    weekday_counts, weekday_means = intensity_profile(arrays["weekday"], intensity, 7)
+    vocab, cooccurrence, trigger_emotion = trigger_matrices(arrays["triggers"], codes)
+
+    # Strongest influence over any non-zero lag, keeping its sign
+    influence = np.zeros((len(EMOTIONS), len(EMOTIONS)))
+    if max_lag > 0:
+        best = np.abs(lagged[1:]).argmax(axis=0)
+        influence = np.take_along_axis(lagged[1:], best[None], axis=0)[0]
+
+    trigger_totals = trigger_emotion.sum(axis=1)
+    trigger_correlations = {
+        t: {
+            "emotion": EMOTIONS[int(trigger_emotion[i].argmax())],
+            "share": round(float(trigger_emotion[i].max() / trigger_totals[i]), 3),
+            "count": int(trigger_totals[i]),
+        }
+        for i, t in enumerate(vocab)
+    }
+    cooccurring = [
+        {"triggers": [vocab[i], vocab[j]], "count": int(cooccurrence[i, j])}
+        for i, j in zip(*np.nonzero(np.triu(cooccurrence, 1)))
+    ]
+
+    emotion_counts = np.bincount(codes, minlength=len(EMOTIONS))
+    return {
+        "entries": int(len(codes)),
+        "days": int(daily.shape[0]),
+        "emotion_counts": {EMOTIONS[i]: int(c) for i, c in enumerate(emotion_counts)},
+        "mean_intensity": round(float(intensity.mean()), 2) if len(intensity) else 0.0,
+        "transition_matrix": {
+            "emotions": EMOTIONS,
+            "counts": counts.tolist(),
+            "probabilities": np.round(probs, 3).tolist(),
+        },
+        "correlates_with": _edges(lagged[0], "correlation", threshold, symmetric=True),
+        "influences": _edges(influence, "strength", threshold),
+        "lagged_correlations": np.round(lagged, 3).tolist(),
+        "by_hour": {"counts": hour_counts.tolist(), "mean_intensity": np.round(hour_means, 2).tolist()},
+        "by_weekday": {
+            "days": WEEKDAYS,
+            "counts": weekday_counts.tolist(),
+            "mean_intensity": np.round(weekday_means, 2).tolist(),
+        },
+        "trigger_correlations": trigger_correlations,
+        "trigger_cooccurrence": sorted(cooccurring, key=lambda pair: -pair["count"]),
+    }
+
+
+def weekday_stress(emotions: list) -> list:
+    """Mood-derived stress (1-10) per weekday, Monday first; None where no data.
+
+    Negative emotions count their intensity as stress, positive ones the
+    inverse (a very happy entry is low stress) and neutral sits at 5.
+    """
+    arrays = timeline_arrays(emotions)
+    intensity = arrays["intensity"]
+    stress = np.select(
+        [np.isin(arrays["codes"], NEGATIVE_CODES), np.isin(arrays["codes"], POSITIVE_CODES)],
+        [intensity, 11 - intensity],
+        5.0,
+    )
+    counts, means = intensity_profile(arrays["weekday"], stress, 7)
+    return [round(float(m), 1) if c else None for c, m in zip(counts, means)]
+
+
+def _analyze_user(item: tuple) -> tuple:
+    """Process pool worker: (user_id, emotions) -> (user_id, analysis)."""
+    user_id, emotions = item
+    return user_id, analyze_timeline(emotions)
+
+
+def analyze_users(user_graphs: dict, processes: int = None, chunksize: int = 32) -> dict:
+    """Analyze every user's timeline in parallel with a process pool.
+
+    `user_graphs` has the same shape as server.user_graphs. With
+    processes=1 the work runs inline (useful for small batches and tests).
+    """
+    items = [(user_id, graph.get("emotions", [])) for user_id, graph in user_graphs.items()]
+    if processes == 1 or len(items) < 2:
+        return dict(map(_analyze_user, items))
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return dict(pool.map(_analyze_user, items, chunksize=chunksize))
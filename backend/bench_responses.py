@@ -0,0 +1,89 @@
+"""
+Benchmark: walker response serialization cost and bytes on the wire
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps) with the
+fast path in responses.py, and reports raw / gzip / brotli sizes.
+
+Run with: python bench_responses.py [entries]
+"""
+
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+import responses
+from analytics import EMOTIONS, analyze_timeline
+from history import append_node, walk_history
+from planner import MindPlanner, week_start_for
+from server import mind_coach
+
+
+def build_graph(n: int) -> dict:
+    graph = {"emotions": [], "suggestions": [], "journal_entries": [], "version": 0}
+    start = datetime.now() - timedelta(days=30)
+    for i in range(n):
+        stamp = (start + timedelta(minutes=43 * i)).isoformat()
+        name = random.choice(EMOTIONS)
+        append_node(graph, "emotions", {
+            "name": name, "intensity": random.randint(1, 10), "timestamp": stamp,
+            "color": "#808080", "note": f"Feeling {name} after a long day at work",
+            "triggers": random.sample(["work", "sleep", "family", "exercise", "money"], 2),
+        })
+        if i % 4 == 0:
+            append_node(graph, "journal_entries", {
+                "content": "Today I noticed how much calmer I felt after a walk. " * 4,
+                "timestamp": stamp, "mood_before": 4, "mood_after": 6,
+                "ai_insight": "It sounds like movement really helps you reset.",
+            })
+    return graph
+
+
+def default_encode(report: dict) -> bytes:
+    content = jsonable_encoder({"result": {}, "reports": [report]})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def fast_encode(report: dict) -> bytes:
+    return responses.dumps({"result": {}, "reports": [report]})
+
+
+def timed(fn, report, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(report)
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main(n: int = 500, repeat: int = 200):
+    graph = build_graph(n)
+    planner = MindPlanner()
+    plan = planner.refresh("bench", week_start_for(), {"workDays": ["Monday", "Tuesday"]})[0]
+
+    reports = {
+        "TrendAnalyzer": {"patterns": {"weekly_trend": "stable"}, "analytics": analyze_timeline(graph["emotions"])},
+        "MindCoach": mind_coach("anxious", 15, 55, True),
+        "MoodHistory (all fields)": walk_history(graph, "emotions", limit=200),
+        "MoodHistory (2 fields, columnar)": walk_history(graph, "emotions", limit=200,
+                                                        fields=["name", "intensity"], encoding="columnar"),
+        "JournalHistory": walk_history(graph, "journal_entries", limit=50),
+        "MindPlanner (full plan)": {"schedule_data": plan["schedule_data"], "plan_data": plan["plan_data"]},
+    }
+
+    print(f"json encoder: {'orjson' if responses.orjson else 'stdlib json'}, "
+          f"brotli: {'yes' if responses.brotli else 'no'}\n")
+    print(f"{'walker':34} {'default us':>10} {'fast us':>8} {'raw B':>8} {'gzip B':>8} {'br B':>8}")
+    for name, report in reports.items():
+        body = fast_encode(report)
+        gz = len(responses.compress(body, "gzip"))
+        br = len(responses.compress(body, "br")) if responses.brotli else 0
+        print(f"{name:34} {timed(default_encode, report, repeat):10.1f} {timed(fast_encode, report, repeat):8.1f} "
+              f"{len(body):8} {gz:8} {br or '-':>8}")
+    print("\nETag hit (If-None-Match): 304 with an empty body, walker not recomputed")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,66 @@
+"""
+Benchmark: notification scheduler throughput and memory per pending reminder
+
+Run with: python bench_scheduler.py [pending_reminders]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from scheduler import NotificationScheduler
+
+
+def main(n: int = 1_000_000):
+    start = datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc)
+    scheduler = NotificationScheduler(start=start.timestamp())
+    users = [f"user-{i}" for i in range(max(1, n // 20))]
+    for i, user_id in enumerate(users[:1000]):
+        scheduler.update_settings(user_id, timezone=random.choice(["UTC", "Africa/Nairobi", "America/New_York"]))
+
+    # Events spread over the next 30 days
+    offsets = [random.randint(60, 30 * 86400) for _ in range(n)]
+    ids = [f"r{i}" for i in range(n)]
+
+    def fill(scheduler):
+        for i in range(n):
+            scheduler.schedule(users[i % len(users)], "Check-in", "How are you feeling?",
+                               start + timedelta(seconds=offsets[i]), reminder_id=ids[i])
+
+    t0 = time.perf_counter()
+    fill(scheduler)
+    elapsed = time.perf_counter() - t0
+    print(f"schedule: {n:,} reminders in {elapsed:.2f}s ({n / elapsed:,.0f}/s)")
+
+    # Memory is measured on a second scheduler so tracing doesn't skew timings
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    probe = NotificationScheduler(start=start.timestamp())
+    fill(probe)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"memory:   {used / n:.0f} bytes per pending reminder ({used / 2**20:.1f} MiB total)")
+
+    cancel = random.sample(ids, n // 10)
+    t0 = time.perf_counter()
+    for reminder_id in cancel:
+        scheduler.cancel(reminder_id)
+    elapsed = time.perf_counter() - t0
+    print(f"cancel:   {len(cancel):,} reminders in {elapsed:.2f}s ({len(cancel) / elapsed:,.0f}/s)")
+
+    # Drain one simulated day, one tick per second like the server loop
+    t0 = time.perf_counter()
+    fired = 0
+    now = start.timestamp()
+    for _ in range(86400):
+        now += 1
+        fired += scheduler.tick(now)
+    elapsed = time.perf_counter() - t0
+    print(f"advance:  1 simulated day, {fired:,} notifications in {elapsed:.2f}s "
+          f"({scheduler.store.batches} batches, {len(scheduler):,} still pending)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
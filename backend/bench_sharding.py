@@ -0,0 +1,124 @@
+"""
+Benchmark: throughput scaling of sharded mode with worker count
+
+For each worker count the router (sharding.py) is started, every shard is
+seeded directly with its users' emotion history, and concurrent clients
+call TrendAnalyzer with varying `days` (so the ETag cache misses and each
+request does real analytics work).
+
+Run with: python bench_sharding.py [max_workers] [seconds]
+
+The load generator and router share the machine with the shards, so
+expect scaling to flatten once they saturate a core of their own.
+"""
+
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from analytics import EMOTIONS
+from sharding import HashRing
+
+ROUTER_PORT = 8300
+BASE_PORT = 8310
+TOKEN = "bench-shard-token"
+
+
+def build_user(entries: int) -> dict:
+    graph = {"emotions": [], "suggestions": [], "journal_entries": [], "version": 0}
+    start = datetime.now() - timedelta(days=60)
+    for i in range(entries):
+        graph["version"] += 1
+        graph["emotions"].append({
+            "name": random.choice(EMOTIONS),
+            "intensity": random.randint(1, 10),
+            "timestamp": (start + timedelta(minutes=173 * i)).isoformat(),
+            "color": "#808080",
+            "note": "",
+            "triggers": random.sample(["work", "sleep", "family", "exercise", "money"], 2),
+            "version": graph["version"],
+        })
+    return {"graph": graph, "plans": {}, "notifications": {}}
+
+
+async def wait_ready(client: httpx.AsyncClient, workers: int):
+    for _ in range(150):
+        try:
+            status = (await client.get(f"http://127.0.0.1:{ROUTER_PORT}/cluster")).json()
+            if len(status["workers"]) == workers:
+                return
+        except (httpx.TransportError, ValueError):
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Router did not start")
+
+
+async def seed(client: httpx.AsyncClient, workers: int, users: int, entries: int):
+    ring = HashRing([f"shard-{i}" for i in range(workers)])
+    by_shard = {}
+    for i in range(users):
+        by_shard.setdefault(ring.owner(f"user-{i}"), {})[f"user-{i}"] = build_user(entries)
+    for node_id, batch in by_shard.items():
+        port = BASE_PORT + int(node_id.split("-")[1])
+        (await client.post(f"http://127.0.0.1:{port}/internal/shard/import",
+                           json={"users": batch}, headers={"X-Shard-Token": TOKEN})).raise_for_status()
+
+
+async def load(client: httpx.AsyncClient, users: int, seconds: float, concurrency: int) -> int:
+    done = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            r = await client.post(f"http://127.0.0.1:{ROUTER_PORT}/walker/TrendAnalyzer", json={
+                "user_id": f"user-{random.randrange(users)}", "days": random.randint(7, 60)})
+            r.raise_for_status()
+            done += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done
+
+
+async def run(workers: int, users: int, entries: int, seconds: float, concurrency: int) -> float:
+    env = {**os.environ, "SHARD_TOKEN": TOKEN}
+    router = subprocess.Popen(
+        [sys.executable, "sharding.py", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(ROUTER_PORT), "--base-port", str(BASE_PORT)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+            await wait_ready(client, workers)
+            await seed(client, workers, users, entries)
+            await load(client, users, 1.0, concurrency)  # warm-up
+            return await load(client, users, seconds, concurrency) / seconds
+    finally:
+        router.terminate()
+        router.wait()
+
+
+def main(max_workers: int = os.cpu_count() or 1, seconds: float = 10.0):
+    counts = [n for n in (1, 2, 4, 8, 16, 32) if n <= max_workers]
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+
+    print(f"cores: {os.cpu_count()}, walker: TrendAnalyzer (500 entries/user, cache-busting days)\n")
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for workers in counts:
+        rps = asyncio.run(run(workers, users=400, entries=500, seconds=seconds, concurrency=16 * workers))
+        baseline = baseline or rps
+        print(f"{workers:7} {rps:9.1f} {rps / baseline:7.2f}x {rps / baseline / workers:9.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 10.0)
@@ -0,0 +1,138 @@
+"""
+SerenityAI History Walkers
+Cursor pagination and delta sync over a user's emotion/journal stores
+
+Every node appended to a user graph is stamped with a per-user, monotonic
+`version`. Stores are append-only and therefore already sorted by version
+(and created time), so both paging and "changes since" are a binary search
+plus a slice - the in-memory equivalent of the (user_id, created_at DESC)
+indexes in schema.sql.
+
+- Page mode: newest first, `next_cursor` continues to older entries
+- Delta mode (since_version / since): oldest first, only entries the
+  client hasn't seen yet, `version` is the new sync point (the last
+  returned entry while `has_more`, so no entries are skipped)
+- `fields` projects a subset of fields; `encoding="columnar"` sends one
+  array per field instead of repeating keys on every row
+"""
+
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+# Fields clients may request per store
+STORE_FIELDS = {
+    "emotions": ["version", "name", "intensity", "timestamp", "color", "note", "triggers"],
+    "journal_entries": ["version", "content", "timestamp", "mood_before", "mood_after", "ai_insight"],
+    "suggestions": ["version", "content", "type", "timestamp"],
+}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+ENCODINGS = ("objects", "columnar")
+
+
+def append_node(graph: dict, store: str, node: dict) -> dict:
+    """Stamp a node with the graph's next version and append it to `store`."""
+    graph["version"] = graph.get("version", 0) + 1
+    node["version"] = graph["version"]
+    graph[store].append(node)
+    return node
+
+
+def encode_cursor(version: int, direction: str) -> str:
+    raw = json.dumps({"v": version, "d": direction}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Return (version, direction); raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return int(data["v"]), str(data["d"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_since(since: str) -> str:
+    """Normalize an ISO timestamp to the naive server-local form nodes are stamped with."""
+    try:
+        moment = datetime.fromisoformat(since)
+    except ValueError:
+        raise ValueError(f"since must be an ISO datetime, got {since!r}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
+
+def project(entries: list, fields: list, encoding: str):
+    """Apply field projection and encoding to a page of entries."""
+    if encoding == "columnar":
+        return {field: [entry.get(field) for entry in entries] for field in fields}
+    return [{field: entry.get(field) for field in fields} for entry in entries]
+
+
+def walk_history(graph: dict, store: str, limit: int = DEFAULT_LIMIT, cursor: str = "",
+                 since_version: int = 0, since: str = "", fields: list = None,
+                 encoding: str = "objects") -> dict:
+    """Read one page of a user's history.
+
+    Raises ValueError for unknown stores/fields/encodings or bad cursors.
+    """
+    if store not in STORE_FIELDS:
+        raise ValueError(f"Unknown store: {store}")
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    fields = list(fields or STORE_FIELDS[store])
+    unknown = [f for f in fields if f not in STORE_FIELDS[store]]
+    if unknown:
+        raise ValueError(f"Unknown fields for {store}: {', '.join(unknown)}")
+    if "version" not in fields:
+        fields.insert(0, "version")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    entries = graph.get(store, [])
+    version_of = lambda e: e["version"]
+
+    if cursor:
+        after, direction = decode_cursor(cursor)
+    elif since_version or since:
+        direction = "forward"
+        after = since_version
+        if since:
+            # First entry created after `since` (timestamps are naive local ISO strings)
+            start = bisect_right(entries, parse_since(since), key=lambda e: e["timestamp"])
+            after = max(after, entries[start - 1]["version"] if start else 0)
+    else:
+        after, direction = None, "backward"
+
+    if direction == "forward":
+        start = bisect_right(entries, after, key=version_of)
+        page = entries[start:start + limit]
+        has_more = start + limit < len(entries)
+    elif direction == "backward":
+        end = len(entries) if after is None else bisect_left(entries, after, key=version_of)
+        page = entries[max(0, end - limit):end][::-1]
+        has_more = end - limit > 0
+    else:
+        raise ValueError("Invalid cursor")
+
+    if direction == "forward" and has_more:
+        # Mid-sync: resuming from the full graph version would skip the rest
+        sync_version = page[-1]["version"]
+    else:
+        sync_version = graph.get("version", 0)
+
+    return {
+        "store": store,
+        "encoding": encoding,
+        "fields": fields,
+        "count": len(page),
+        "items": project(page, fields, encoding),
+        "has_more": has_more,
+        "next_cursor": encode_cursor(page[-1]["version"], direction) if has_more else None,
+        "version": sync_version,
+    }
+
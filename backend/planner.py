@@ -0,0 +1,381 @@
+"""
+SerenityAI MindPlanner
+Cached weekly wellness plans with incremental JSON patches
+
+Mirrors the wellness_plans table: one plan per (user_id, week_start) with
+`schedule_data` and `plan_data`. The plan is generated once per week and
+cached; afterwards:
+- Client edits arrive as JSON Patch operations (RFC 6902 subset: add,
+  remove, replace, test) instead of full-document rewrites
+- When the schedule or mood data changes only the days whose inputs
+  changed are regenerated, and the change goes back out as patches
+- Days the client edited are never regenerated over; if their inputs
+  change they are reported as kept until the client resets them
+"""
+
+import copy
+import threading
+from datetime import date, timedelta
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+DEFAULT_SCHEDULE = {
+    "occupation": "",
+    "workDays": [],
+    "workStartHour": 9,
+    "workEndHour": 17,
+    "stressByDay": {
+        "Monday": 5, "Tuesday": 5, "Wednesday": 5, "Thursday": 5,
+        "Friday": 5, "Saturday": 3, "Sunday": 2,
+    },
+}
+
+
+class PatchError(ValueError):
+    """A JSON patch could not be applied."""
+
+
+class PlanConflict(Exception):
+    """Patches were based on an out-of-date plan version."""
+
+
+def week_start_for(day: date = None) -> str:
+    """ISO date of the Monday starting the week containing `day`."""
+    day = day or date.today()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+# =====================================================
+# JSON PATCH (RFC 6902 subset)
+# =====================================================
+
+def _parse_pointer(path: str) -> list:
+    if not path.startswith("/"):
+        raise PatchError(f"Invalid path: {path!r}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+
+def _resolve(doc, parts: list):
+    """Walk to the parent container of the last path segment."""
+    target = doc
+    for part in parts[:-1]:
+        try:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        except (KeyError, IndexError, ValueError):
+            raise PatchError(f"Path not found: /{'/'.join(parts)}")
+    return target, parts[-1]
+
+
+def apply_patch(doc: dict, operations: list) -> dict:
+    """Apply JSON patch operations in place; all-or-nothing on failure."""
+    working = copy.deepcopy(doc)
+    for op in operations:
+        kind, parts = op.get("op"), _parse_pointer(op.get("path", ""))
+        parent, key = _resolve(working, parts)
+        try:
+            if isinstance(parent, list):
+                index = len(parent) if key == "-" else int(key)
+                if kind == "add":
+                    if not 0 <= index <= len(parent):
+                        raise IndexError
+                    parent.insert(index, op["value"])
+                elif kind == "remove":
+                    parent.pop(index)
+                elif kind == "replace":
+                    parent[index] = op["value"]
+                elif kind == "test":
+                    if parent[index] != op["value"]:
+                        raise PatchError(f"Test failed at {op['path']}")
+                else:
+                    raise PatchError(f"Unsupported op: {kind!r}")
+            else:
+                if kind == "add":
+                    parent[key] = op["value"]
+                elif kind == "remove":
+                    del parent[key]
+                elif kind == "replace":
+                    if key not in parent:
+                        raise KeyError
+                    parent[key] = op["value"]
+                elif kind == "test":
+                    if parent.get(key) != op["value"]:
+                        raise PatchError(f"Test failed at {op['path']}")
+                else:
+                    raise PatchError(f"Unsupported op: {kind!r}")
+        except PatchError:
+            raise
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise PatchError(f"Cannot {kind} at {op.get('path')}")
+    doc.clear()
+    doc.update(working)
+    return doc
+
+
+# =====================================================
+# VALIDATION
+# =====================================================
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_schedule(schedule: dict):
+    """Check schedule_data against DEFAULT_SCHEDULE's shape; raises PatchError."""
+    if not isinstance(schedule, dict):
+        raise PatchError("schedule_data must be an object")
+    unknown = set(schedule) - set(DEFAULT_SCHEDULE)
+    if unknown:
+        raise PatchError(f"Unknown schedule fields: {', '.join(sorted(unknown))}")
+    if not isinstance(schedule.get("occupation", ""), str):
+        raise PatchError("occupation must be a string")
+    for field in ("workStartHour", "workEndHour"):
+        hour = schedule.get(field, DEFAULT_SCHEDULE[field])
+        if not _is_int(hour) or not 0 <= hour <= 23:
+            raise PatchError(f"{field} must be an hour 0-23, got {hour!r}")
+    work_days = schedule.get("workDays", [])
+    if not isinstance(work_days, list) or not all(day in DAYS for day in work_days):
+        raise PatchError(f"workDays must be a list of {', '.join(DAYS)}")
+    stress = schedule.get("stressByDay", {})
+    if not isinstance(stress, dict) or not all(day in DAYS and _is_int(v) for day, v in stress.items()):
+        raise PatchError("stressByDay must map day names to integers")
+
+
+def validate_plan_data(plan_data: list):
+    """Each slot must stay the day it belongs to (index i is DAYS[i])."""
+    if len(plan_data) != len(DAYS):
+        raise PatchError("plan_data must keep one entry per day")
+    for day, day_plan in zip(DAYS, plan_data):
+        if not isinstance(day_plan, dict) or day_plan.get("day") != day:
+            raise PatchError(f"plan_data entry for {day} must be an object with day={day!r}")
+
+
+def _check_operation(op) -> list:
+    """Allowed paths: /schedule_data/..., inside a day, or replace/test of a whole day."""
+    if not isinstance(op, dict):
+        raise PatchError(f"Patch operations must be objects, got {op!r}")
+    path = op.get("path")
+    parts = _parse_pointer(path) if isinstance(path, str) else None
+    if parts and parts[0] == "schedule_data" and len(parts) > 1:
+        return parts
+    if parts and parts[0] == "plan_data" and len(parts) > 1 and parts[1] in {str(i) for i in range(len(DAYS))}:
+        if len(parts) > 2 or op.get("op") in ("replace", "test"):
+            return parts
+        raise PatchError(f"Days can't be added or removed: {path}")
+    raise PatchError(f"Only plan_data days and schedule_data can be patched: {path!r}")
+
+
+# =====================================================
+# PLAN GENERATION
+# =====================================================
+
+def effective_stress(schedule: dict, mood_stress: list) -> dict:
+    """Blend self-reported stress with mood-derived stress per weekday."""
+    stress = {}
+    for i, day in enumerate(DAYS):
+        reported = schedule.get("stressByDay", {}).get(day, 5)
+        mood = mood_stress[i] if mood_stress else None
+        stress[day] = reported if mood is None else round((reported + mood) / 2)
+    return stress
+
+
+def day_inputs(day: str, schedule: dict, stress: int) -> tuple:
+    """Everything a generated day depends on; the day is rebuilt when this changes."""
+    return (
+        day in schedule.get("workDays", []),
+        schedule.get("workStartHour", 9),
+        schedule.get("workEndHour", 17),
+        schedule.get("occupation", ""),
+        stress,
+    )
+
+
+def _hour_label(hour: int) -> str:
+    suffix = "AM" if hour % 24 < 12 else "PM"
+    return f"{(hour % 12) or 12}:00 {suffix}"
+
+
+def generate_day(day: str, schedule: dict, stress: int, affirmation: str) -> dict:
+    """Build one day of the plan (same activity mix as the MindPlanner UI)."""
+    is_work_day = day in schedule.get("workDays", [])
+    prefix = day[:3].lower()
+    end_hour = schedule.get("workEndHour", 17)
+    return {
+        "day": day,
+        "activities": [
+            {
+                "id": f"{prefix}-morning",
+                "time": "7:00 AM",
+                "activity": "Gentle morning stretch" if stress > 6 else "Energizing yoga flow",
+                "icon": "🧠",
+                "duration": "15 min",
+            },
+            {
+                "id": f"{prefix}-breathing",
+                "time": "12:30 PM" if is_work_day else "10:00 AM",
+                "activity": "Mindful breathing break",
+                "icon": "🫁",
+                "duration": "5 min",
+            },
+            {
+                "id": f"{prefix}-afternoon",
+                "time": _hour_label(end_hour + 1) if is_work_day else "3:00 PM",
+                "activity": "Stress-relief walk" if stress > 7 else "Creative activity time",
+                "icon": "🚶" if stress > 7 else "🎨",
+                "duration": "30 min",
+            },
+            {
+                "id": f"{prefix}-evening",
+                "time": "9:00 PM",
+                "activity": "Gratitude journaling",
+                "icon": "📝",
+                "duration": "10 min",
+            },
+        ],
+        "affirmation": affirmation,
+    }
+
+
+def default_affirmation(day: str, stress: int) -> str:
+    if stress > 6:
+        return "I release what I cannot control and embrace peace."
+    return "I am capable, calm, and ready for whatever comes."
+
+
+# =====================================================
+# PLANNER
+# =====================================================
+
+class MindPlanner:
+    """Per-user, per-week plan cache.
+
+    `affirm(day, stress)` produces a day's affirmation (e.g. an LLM call);
+    it only runs for days that are actually (re)generated.
+    """
+
+    def __init__(self, affirm=default_affirmation):
+        self.affirm = affirm
+        self.plans = {}  # (user_id, week_start) -> plan record
+        self._locks = {}  # (user_id, week_start) -> threading.Lock
+
+    def get(self, user_id: str, week_start: str):
+        return self.plans.get((user_id, week_start))
+
+    def export_users(self, user_ids: set, remove: bool = False) -> dict:
+        """{user_id: {week_start: plan}} for `user_ids` (shard handoff); `remove` drops them here."""
+        states = {user_id: {} for user_id in user_ids}
+        for user_id, week_start in [key for key in self.plans if key[0] in user_ids]:
+            get = self.plans.pop if remove else self.plans.get
+            states[user_id][week_start] = get((user_id, week_start))
+        return states
+
+    def load_user(self, user_id: str, plans: dict):
+        """Restore plans exported by export_users() (JSON turns input tuples into lists)."""
+        for week_start, plan in plans.items():
+            plan["inputs"] = {day: tuple(inputs) for day, inputs in plan.get("inputs", {}).items()}
+            self.plans[(user_id, week_start)] = plan
+
+    def update(self, user_id: str, week_start: str, operations: list = None, base_version: int = 0,
+               schedule: dict = None, mood_stress: list = None, reset_days: list = None) -> tuple:
+        """Apply client patches, then refresh; returns (plan, patches, regenerated_days, kept_days).
+
+        Works on a copy that only replaces the cached plan once everything
+        succeeded, so a PatchError or PlanConflict leaves it untouched.
+        Safe to call from worker threads (one update per plan at a time).
+        """
+        key = (user_id, week_start)
+        with self._locks.setdefault(key, threading.Lock()):
+            current = self.plans.get(key)
+            if current is None and operations:
+                raise PatchError(f"No plan for week {week_start}")
+            plan = copy.deepcopy(current) if current is not None else {
+                "week_start": week_start,
+                "schedule_data": copy.deepcopy(DEFAULT_SCHEDULE),
+                "plan_data": [],
+                "inputs": {},
+                "edited": [],
+                "version": 0,
+            }
+            if operations:
+                self._patch(plan, operations, base_version)
+            patches, regenerated, kept = self._refresh(plan, schedule, mood_stress, reset_days)
+            self.plans[key] = plan
+            return plan, patches, regenerated, kept
+
+    def refresh(self, user_id: str, week_start: str, schedule: dict = None, mood_stress: list = None,
+                reset_days: list = None) -> tuple:
+        """Create or update a week plan; returns (plan, patches, regenerated_days, kept_days)."""
+        return self.update(user_id, week_start, schedule=schedule, mood_stress=mood_stress, reset_days=reset_days)
+
+    def patch(self, user_id: str, week_start: str, operations: list, base_version: int) -> dict:
+        """Apply client edits to a cached plan (see update())."""
+        if self.get(user_id, week_start) is None:
+            raise PatchError(f"No plan for week {week_start}")
+        return self.update(user_id, week_start, operations, base_version)[0]
+
+    def _refresh(self, plan: dict, schedule: dict, mood_stress: list, reset_days: list) -> tuple:
+        """Regenerate changed days in place; returns (patches, regenerated_days, kept_days).
+
+        Only days whose inputs changed are regenerated. Client-edited days
+        are kept (and listed in kept_days) unless named in `reset_days`.
+        """
+        edited = plan.setdefault("edited", [])
+        for day in reset_days or []:
+            if day in edited:
+                edited.remove(day)
+                plan["inputs"].pop(day, None)
+
+        patches = []
+        if schedule is not None and not isinstance(schedule, dict):
+            raise PatchError("schedule must be an object")
+        merged = {**plan["schedule_data"], **(schedule or {})}
+        validate_schedule(merged)
+        if merged != plan["schedule_data"]:
+            plan["schedule_data"] = merged
+            patches.append({"op": "replace", "path": "/schedule_data", "value": plan["schedule_data"]})
+
+        stress = effective_stress(plan["schedule_data"], mood_stress)
+        regenerated, kept = [], []
+        for i, day in enumerate(DAYS):
+            inputs = day_inputs(day, plan["schedule_data"], stress[day])
+            if plan["inputs"].get(day) == inputs and i < len(plan["plan_data"]):
+                continue
+            if day in edited and i < len(plan["plan_data"]):
+                kept.append(day)
+                continue
+            day_plan = generate_day(day, plan["schedule_data"], stress[day], self.affirm(day, stress[day]))
+            if i < len(plan["plan_data"]):
+                plan["plan_data"][i] = day_plan
+                patches.append({"op": "replace", "path": f"/plan_data/{i}", "value": day_plan})
+            else:
+                plan["plan_data"].append(day_plan)
+                patches.append({"op": "add", "path": f"/plan_data/{i}", "value": day_plan})
+            plan["inputs"][day] = inputs
+            regenerated.append(day)
+
+        if patches:
+            plan["version"] += 1
+        return patches, regenerated, kept
+
+    def _patch(self, plan: dict, operations: list, base_version: int):
+        """Apply client edits in place.
+
+        Raises PlanConflict when base_version is stale and PatchError for
+        invalid operations or values.
+        """
+        if base_version != plan["version"]:
+            raise PlanConflict(f"Plan is at version {plan['version']}, patch based on {base_version}")
+        if not isinstance(operations, list):
+            raise PatchError("patches must be a list")
+        touched = [_check_operation(op) for op in operations]
+
+        document = {"schedule_data": plan["schedule_data"], "plan_data": plan["plan_data"]}
+        apply_patch(document, operations)
+        validate_schedule(document["schedule_data"])
+        validate_plan_data(document["plan_data"])
+        plan["schedule_data"], plan["plan_data"] = document["schedule_data"], document["plan_data"]
+
+        edited = plan.setdefault("edited", [])
+        for parts in touched:
+            if parts[0] == "plan_data" and DAYS[int(parts[1])] not in edited:
+                edited.append(DAYS[int(parts[1])])
+        plan["version"] += 1
@@ -0,0 +1,172 @@
+"""
+SerenityAI Request Profiler
+On-demand sampling profiler for walker endpoints
+
+- A background thread samples the event-loop thread's stack every few
+  milliseconds while a profiled request runs (sys._current_frames)
+- Requests are profiled when they carry `X-Profile: <PROFILE_TOKEN>` or
+  fall in the sampled fraction of traffic (`PROFILE_SAMPLE_RATE`)
+- Samples are aggregated per walker as collapsed stacks
+  ("frame;frame;frame count"), the input format of flamegraph.pl and
+  speedscope
+- ProfileMiddleware is plain ASGI: requests outside /walker/ cost one
+  prefix check, walker requests one header scan and float comparison
+
+Note: async walkers share the event-loop thread, so when requests
+overlap a profile can include samples from the other request.
+"""
+
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+
+def collapse(frame) -> str:
+    """Render a frame chain root-first as a collapsed stack."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class Sampler:
+    """Samples one thread's stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class RequestProfiler:
+    """Decides which requests to profile and aggregates their samples per walker."""
+
+    def __init__(self, sample_rate: float = 0.0, token: str = None, interval: float = 0.005, keep: int = 50):
+        self.sample_rate = sample_rate
+        self.token = token
+        self.interval = interval
+        self.stacks = {}  # walker -> Counter of collapsed stacks
+        self.totals = {}  # walker -> {"requests", "seconds", "samples"}
+        self.recent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def should_profile(self, header: str = None) -> bool:
+        if header and self.token and secrets.compare_digest(header.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> Sampler:
+        return Sampler(threading.get_ident(), self.interval).start()
+
+    def finish(self, walker: str, sampler: Sampler, seconds: float):
+        stacks = sampler.stop()
+        samples = sum(stacks.values())
+        with self._lock:
+            self.stacks.setdefault(walker, Counter()).update(stacks)
+            totals = self.totals.setdefault(walker, {"requests": 0, "seconds": 0.0, "samples": 0})
+            totals["requests"] += 1
+            totals["seconds"] += seconds
+            totals["samples"] += samples
+            self.recent.append({
+                "walker": walker,
+                "seconds": round(seconds, 4),
+                "samples": samples,
+                "at": time.time(),
+            })
+
+    def collapsed(self, walker: str = None) -> str:
+        """Collapsed-stack text for one walker, or all walkers prefixed by name."""
+        with self._lock:
+            if walker is not None:
+                lines = self.stacks.get(walker, Counter()).most_common()
+            else:
+                lines = [(f"{name};{stack}", count)
+                         for name, stacks in self.stacks.items() for stack, count in stacks.items()]
+        return "\n".join(f"{stack} {count}" for stack, count in lines)
+
+    def summary(self, top: int = 10) -> dict:
+        """Per-walker request counts, mean latency and hottest leaf frames."""
+        with self._lock:
+            walkers = {}
+            for name, totals in self.totals.items():
+                leaves = Counter()
+                for stack, count in self.stacks.get(name, {}).items():
+                    leaves[stack.rsplit(";", 1)[-1]] += count
+                walkers[name] = {
+                    **totals,
+                    "mean_ms": round(1000 * totals["seconds"] / totals["requests"], 2),
+                    "top_frames": [{"frame": f, "samples": c} for f, c in leaves.most_common(top)],
+                }
+            return {
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000,
+                "walkers": walkers,
+                "recent": list(self.recent),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.totals.clear()
+            self.recent.clear()
+
+
+class ProfileMiddleware:
+    """ASGI middleware that profiles walker requests picked by the profiler.
+
+    Only requests that matched a route are recorded, so unknown paths
+    can't add walkers to the summary.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, prefix: str = "/walker/"):
+        self.app = app
+        self.profiler = profiler
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+
+        header = None
+        if self.profiler.token:
+            for key, value in scope["headers"]:
+                if key == b"x-profile":
+                    header = value.decode("latin-1")
+                    break
+        if not self.profiler.should_profile(header):
+            return await self.app(scope, receive, send)
+
+        sampler = self.profiler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            seconds = time.perf_counter() - started
+            # The router stores the matched endpoint in the (shared) scope
+            if "endpoint" in scope:
+                self.profiler.finish(scope["path"][len(self.prefix):], sampler, seconds)
+            else:
+                sampler.stop()
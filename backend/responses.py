@@ -0,0 +1,157 @@
+"""
+SerenityAI Fast Response Path
+Serialization, conditional caching and compression for walker responses
+
+- Walker responses are returned as ready-made Response objects, skipping
+  FastAPI's recursive jsonable_encoder pass
+- JSON is encoded with orjson when installed (falls back to compact json)
+- Read walkers get a weak ETag derived from the user's graph version and
+  the request parameters; If-None-Match hits return 304 without
+  recomputing, other repeats are served from a small LRU body cache
+- Large bodies are compressed with brotli (if installed) or gzip,
+  following the client's Accept-Encoding
+"""
+
+import gzip
+import hashlib
+import json
+import secrets
+from collections import OrderedDict
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    print("⚠️ orjson not installed - using stdlib json for responses")
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+
+# Fallback identity for graphs without an "id" (changes on every restart)
+BOOT_NONCE = secrets.token_hex(8)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+class FastJSONResponse(Response):
+    """JSONResponse drop-in that uses orjson when available."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def make_etag(walker: str, graph: dict, *parts) -> str:
+    """Weak ETag for a walker response at the graph's current version.
+
+    Versions restart at 0 for a recreated graph, so the graph's creation id
+    is part of the key; an ETag from before a restart never matches.
+    """
+    key = "|".join(str(p) for p in (walker, graph.get("id", BOOT_NONCE), graph["version"]) + parts)
+    return f'W/"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+
+def _choose_encoding(accept_encoding: str) -> str:
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+class ResponseCache:
+    """LRU cache of encoded walker bodies keyed by ETag."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # etag -> {encoding: bytes}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str):
+        variants = self.entries.get(etag)
+        if variants is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(etag)
+        self.hits += 1
+        return variants
+
+    def put(self, etag: str, body: bytes) -> dict:
+        variants = {"": body}
+        self.entries[etag] = variants
+        self.entries.move_to_end(etag)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return variants
+
+
+def encode_response(variants: dict, headers, etag: str = None) -> Response:
+    """Build the final Response, compressing (and caching the variant) if worthwhile."""
+    body = variants[""]
+    response_headers = {"Vary": "Accept-Encoding"}
+    if etag:
+        response_headers["ETag"] = etag
+        response_headers["Cache-Control"] = "private, no-cache"
+
+    encoding = _choose_encoding(headers.get("accept-encoding")) if len(body) >= COMPRESS_MIN_BYTES else ""
+    if encoding:
+        if encoding not in variants:
+            variants[encoding] = compress(body, encoding)
+        body = variants[encoding]
+        response_headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=response_headers)
+
+
+def walker_response(report: dict, headers) -> Response:
+    """Fast path for walkers without conditional caching."""
+    return encode_response({"": dumps({"result": {}, "reports": [report]})}, headers)
+
+
+def cached_walker_response(cache: ResponseCache, etag: str, headers, compute) -> Response:
+    """Serve a read walker with ETag / If-None-Match support.
+
+    `compute()` only runs on a cache miss and returns (report, cacheable).
+    Reports that are not cacheable (e.g. built from an LLM fallback) are
+    sent without an ETag so neither side keeps them.
+    """
+    if _etag_matches(headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+    variants = cache.get(etag)
+    if variants is None:
+        report, cacheable = compute()
+        body = dumps({"result": {}, "reports": [report]})
+        if not cacheable:
+            return encode_response({"": body}, headers)
+        variants = cache.put(etag, body)
+    return encode_response(variants, headers, etag)
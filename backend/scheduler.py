@@ -0,0 +1,458 @@
+"""
+SerenityAI Notification Scheduler
+Backend reminders on a hierarchical timing wheel
+
+- O(1) schedule/cancel: each wheel slot is a dict keyed by reminder_id
+- 4 levels x 256 one-second slots covers ~136 years of delay
+- Honors notification_settings (enabled flags, quiet hours, time zone)
+- Due notifications are written in batches to the `notifications` table
+  (Supabase REST) or to an in-memory stand-in store
+"""
+
+import asyncio
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, time as dtime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# notifications.type -> notification_settings flag
+TYPE_FLAGS = {
+    "reminder": "reminders_enabled",
+    "achievement": "achievements_enabled",
+    "tip": "tips_enabled",
+}
+
+
+# =====================================================
+# SETTINGS (mirror of notification_settings table)
+# =====================================================
+
+@dataclass
+class NotificationSettings:
+    reminders_enabled: bool = True
+    achievements_enabled: bool = True
+    tips_enabled: bool = True
+    reminder_minutes: int = 5
+    quiet_start: str = "22:00"
+    quiet_end: str = "07:00"
+    timezone: str = "UTC"
+
+    def __post_init__(self):
+        for name in ("quiet_start", "quiet_end"):
+            try:
+                dtime.fromisoformat(getattr(self, name))
+            except ValueError:
+                raise ValueError(f"{name} must be HH:MM, got {getattr(self, name)!r}")
+        try:
+            ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError, TypeError):
+            raise ValueError(f"timezone must be an IANA zone name, got {self.timezone!r}")
+
+    def zone(self):
+        return ZoneInfo(self.timezone)
+
+    def allows(self, notification_type: str) -> bool:
+        flag = TYPE_FLAGS.get(notification_type)
+        return getattr(self, flag) if flag else True
+
+    def quiet_until(self, when: datetime):
+        """Return the end of quiet hours if `when` falls inside them, else None."""
+        local = when.astimezone(self.zone())
+        start = dtime.fromisoformat(self.quiet_start)
+        end = dtime.fromisoformat(self.quiet_end)
+        now = local.time().replace(tzinfo=None)
+
+        if start == end:
+            return None
+        if start < end:
+            quiet = start <= now < end
+        else:
+            quiet = now >= start or now < end
+        if not quiet:
+            return None
+
+        until = local.replace(hour=end.hour, minute=end.minute, second=end.second, microsecond=0)
+        if until <= local:
+            until += timedelta(days=1)
+        return until
+
+
+# =====================================================
+# HIERARCHICAL TIMING WHEEL
+# =====================================================
+
+class Reminder:
+    """A pending notification. __slots__ keeps millions of these cheap."""
+
+    __slots__ = ("reminder_id", "user_id", "type", "title", "message",
+                 "action_url", "metadata", "event_at", "due", "level", "slot")
+
+    def __init__(self, reminder_id, user_id, type, title, message, action_url, metadata, event_at, due):
+        self.reminder_id = reminder_id
+        self.user_id = user_id
+        self.type = type
+        self.title = title
+        self.message = message
+        self.action_url = action_url
+        self.metadata = metadata
+        self.event_at = event_at  # event timestamp (seconds)
+        self.due = due  # absolute tick
+        self.level = -1
+        self.slot = -1
+
+
+class TimingWheel:
+    """Hierarchical timing wheel with O(1) insert and cancel.
+
+    Level L holds items due within 256^(L+1) ticks; higher levels are
+    cascaded down as the lower wheel wraps around.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, slot_bits: int = 8, levels: int = 4, start: float = None):
+        self.tick_seconds = tick_seconds
+        self.slot_bits = slot_bits
+        self.mask = (1 << slot_bits) - 1
+        self.levels = levels
+        self.wheels = [[{} for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self.index = {}  # reminder_id -> Reminder
+        self.expired = []  # inserted already due; returned on next advance
+        self.current = self.to_tick(time.time() if start is None else start)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, reminder_id) -> bool:
+        return reminder_id in self.index
+
+    def to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def insert(self, reminder: Reminder):
+        self.index[reminder.reminder_id] = reminder
+        self._place(reminder)
+
+    def _place(self, reminder: Reminder):
+        delay = reminder.due - self.current
+        if delay <= 0:
+            reminder.level, reminder.slot = -1, -1
+            self.expired.append(reminder)
+            return
+
+        level = 0
+        while level < self.levels - 1 and delay >> (self.slot_bits * (level + 1)):
+            level += 1
+        slot = (reminder.due >> (self.slot_bits * level)) & self.mask
+        reminder.level, reminder.slot = level, slot
+        self.wheels[level][slot][reminder.reminder_id] = reminder
+
+    def cancel(self, reminder_id) -> bool:
+        reminder = self.index.pop(reminder_id, None)
+        if reminder is None:
+            return False
+        if reminder.level >= 0:
+            del self.wheels[reminder.level][reminder.slot][reminder_id]
+        else:
+            self.expired.remove(reminder)
+        return True
+
+    def advance(self, timestamp: float = None) -> list:
+        """Move the wheel forward to `timestamp` and return every due reminder."""
+        target = self.to_tick(time.time() if timestamp is None else timestamp)
+        due, self.expired = self.expired, []
+
+        while self.current < target:
+            self.current += 1
+            tick = self.current
+
+            # Cascade top-down so items land in lower slots before those are processed
+            cascade = [level for level in range(1, self.levels)
+                       if tick & ((1 << (self.slot_bits * level)) - 1) == 0]
+            for level in reversed(cascade):
+                slot = (tick >> (self.slot_bits * level)) & self.mask
+                bucket, self.wheels[level][slot] = self.wheels[level][slot], {}
+                for reminder in bucket.values():
+                    self._place(reminder)
+
+            bucket = self.wheels[0][tick & self.mask]
+            if bucket:
+                self.wheels[0][tick & self.mask] = {}
+                due.extend(bucket.values())
+            if self.expired:
+                due.extend(self.expired)
+                self.expired = []
+
+        for reminder in due:
+            del self.index[reminder.reminder_id]
+        return due
+
+
+# =====================================================
+# NOTIFICATION STORES
+# =====================================================
+
+class MemoryNotificationStore:
+    """Local stand-in for the notifications table."""
+
+    def __init__(self):
+        self.rows = []
+        self.batches = 0
+
+    def check_user_id(self, user_id: str):
+        if not user_id:
+            raise ValueError("user_id is required")
+
+    def insert_many(self, rows: list):
+        self.rows.extend(rows)
+        self.batches += 1
+
+
+class SupabaseNotificationStore:
+    """Batch insert into the notifications table through Supabase REST."""
+
+    def __init__(self, url: str, service_key: str, timeout: float = 10.0):
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/notifications"
+        self.headers = {
+            "apikey": service_key,
+            "Authorization": f"Bearer {service_key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=minimal",
+        }
+        self.timeout = timeout
+
+    def check_user_id(self, user_id: str):
+        # notifications.user_id references auth.users(id)
+        try:
+            uuid.UUID(user_id)
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError(f"user_id must be a UUID, got {user_id!r}")
+
+    def insert_many(self, rows: list):
+        """Insert rows in one request; raises ValueError when PostgREST rejects them.
+
+        The insert is all-or-nothing, so one bad row rejects the whole batch.
+        """
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(rows).encode(), headers=self.headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code not in (401, 403, 408, 429):
+                raise ValueError(f"Rows rejected ({e.code}): {e.read()[:200]!r}")
+            raise
+
+
+def default_store():
+    """Supabase store when credentials are configured, otherwise in-memory."""
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_KEY")
+    if url and key:
+        print("✅ Notification scheduler writing to Supabase")
+        return SupabaseNotificationStore(url, key)
+    print("⚠️ No SUPABASE_URL/SUPABASE_SERVICE_KEY - notifications kept in memory")
+    return MemoryNotificationStore()
+
+
+# =====================================================
+# SCHEDULER
+# =====================================================
+
+class NotificationScheduler:
+    """Schedules user notifications and flushes due ones in batches."""
+
+    def __init__(self, store=None, batch_size: int = 500, tick_seconds: float = 1.0, start: float = None):
+        self.store = store if store is not None else MemoryNotificationStore()
+        self.batch_size = batch_size
+        self.wheel = TimingWheel(tick_seconds=tick_seconds, start=start)
+        self.settings = {}  # user_id -> NotificationSettings
+        self.retry = []  # rows whose write failed transiently; sent again next tick
+        self.held = set()  # users being handed to another shard; their reminders don't fire here
+        self.parked = {}  # user_id -> reminders that came due while held
+
+    def __len__(self) -> int:
+        return len(self.wheel)
+
+    def get_settings(self, user_id: str) -> NotificationSettings:
+        return self.settings.get(user_id) or NotificationSettings()
+
+    def update_settings(self, user_id: str, **fields) -> NotificationSettings:
+        settings = self.get_settings(user_id)
+        settings = NotificationSettings(**{**settings.__dict__, **fields})
+        self.settings[user_id] = settings
+        return settings
+
+    def schedule(self, user_id: str, title: str, message: str, event_at: datetime,
+                 type: str = "reminder", action_url: str = None, metadata: dict = None,
+                 reminder_id: str = None) -> tuple:
+        """Schedule a notification; reminders fire `reminder_minutes` before the event.
+
+        Naive datetimes are read in the user's time zone. Returns (reminder_id, due_at).
+        Raises ValueError when the store would reject `user_id` or the
+        reminder_id belongs to another user.
+        """
+        self.store.check_user_id(user_id)
+        existing = self.wheel.index.get(reminder_id) if reminder_id else None
+        if existing is not None and existing.user_id != user_id:
+            raise ValueError(f"Reminder {reminder_id} belongs to another user")
+        settings = self.get_settings(user_id)
+        if event_at.tzinfo is None:
+            event_at = event_at.replace(tzinfo=settings.zone())
+        due_at = event_at - timedelta(minutes=settings.reminder_minutes) if type == "reminder" else event_at
+
+        reminder_id = reminder_id or str(uuid.uuid4())
+        self.wheel.cancel(reminder_id)
+        self.wheel.insert(Reminder(
+            reminder_id, user_id, type, title, message, action_url, metadata,
+            event_at.timestamp(), self.wheel.to_tick(due_at.timestamp()),
+        ))
+        return reminder_id, due_at
+
+    def cancel(self, reminder_id: str, user_id: str) -> bool:
+        """Cancel one of `user_id`'s pending reminders; other users' ids are left alone."""
+        reminder = self.wheel.index.get(reminder_id)
+        if reminder is None or reminder.user_id != user_id:
+            return False
+        return self.wheel.cancel(reminder_id)
+
+    def export_users(self, user_ids: set, remove: bool = False) -> dict:
+        """Settings + pending reminders for `user_ids` (shard handoff); `remove` drops them here.
+
+        Exported users are held: their reminders stop firing here until
+        they are removed or resume_users() is called, so a reminder due
+        during the handoff only fires on one shard.
+        """
+        states = {}
+        for user_id in user_ids:
+            settings = self.settings.pop(user_id, None) if remove else self.settings.get(user_id)
+            states[user_id] = {"settings": settings.__dict__ if settings else None, "reminders": []}
+
+        moving = [r for r in self.wheel.index.values() if r.user_id in user_ids]
+        for user_id in user_ids:
+            moving.extend(self.parked.pop(user_id, []) if remove else self.parked.get(user_id, []))
+        if remove:
+            self.held -= set(user_ids)
+        else:
+            self.held |= set(user_ids)
+        for reminder in moving:
+            if remove and reminder.reminder_id in self.wheel:
+                self.wheel.cancel(reminder.reminder_id)
+            states[reminder.user_id]["reminders"].append({
+                "reminder_id": reminder.reminder_id,
+                "type": reminder.type,
+                "title": reminder.title,
+                "message": reminder.message,
+                "action_url": reminder.action_url,
+                "metadata": reminder.metadata,
+                "event_at": reminder.event_at,
+                "due_at": reminder.due * self.wheel.tick_seconds,
+            })
+        return states
+
+    def resume_users(self, user_ids: set):
+        """Undo the hold from export_users() after a failed handoff."""
+        for user_id in user_ids:
+            self.held.discard(user_id)
+            for reminder in self.parked.pop(user_id, []):
+                self.wheel.insert(reminder)
+
+    def load_user(self, user_id: str, state: dict):
+        """Restore a user exported by export_users()."""
+        if state.get("settings"):
+            self.settings[user_id] = NotificationSettings(**state["settings"])
+        for r in state.get("reminders", []):
+            self.wheel.cancel(r["reminder_id"])
+            self.wheel.insert(Reminder(
+                r["reminder_id"], user_id, r["type"], r["title"], r["message"], r["action_url"],
+                r["metadata"], r["event_at"], self.wheel.to_tick(r["due_at"]),
+            ))
+
+    def collect(self, now: float = None) -> list:
+        """Advance to `now` and return notification rows that should be sent.
+
+        Disabled types are dropped; reminders landing in quiet hours are
+        pushed back to the user's quiet_end.
+        """
+        rows = []
+        for reminder in self.wheel.advance(now):
+            if reminder.user_id in self.held:
+                self.parked.setdefault(reminder.user_id, []).append(reminder)
+                continue
+            settings = self.get_settings(reminder.user_id)
+            if not settings.allows(reminder.type):
+                continue
+
+            fire_at = datetime.fromtimestamp(max(reminder.due, self.wheel.current) * self.wheel.tick_seconds, timezone.utc)
+            until = settings.quiet_until(fire_at)
+            if until is not None:
+                reminder.due = self.wheel.to_tick(until.timestamp())
+                self.wheel.insert(reminder)
+                continue
+
+            rows.append({
+                "user_id": reminder.user_id,
+                "type": reminder.type,
+                "title": reminder.title,
+                "message": reminder.message,
+                "action_url": reminder.action_url,
+                "metadata": {
+                    **(reminder.metadata or {}),
+                    "reminder_id": reminder.reminder_id,
+                    "event_at": datetime.fromtimestamp(reminder.event_at, settings.zone()).isoformat(),
+                },
+                "created_at": fire_at.isoformat(),
+            })
+        return rows
+
+    def due_rows(self, now: float = None) -> list:
+        """Rows to write now: earlier failed rows first, then newly due ones."""
+        rows, self.retry = self.retry, []
+        return rows + self.collect(now)
+
+    def _write_batch(self, rows: list) -> list:
+        try:
+            self.store.insert_many(rows)
+            return []
+        except ValueError as e:
+            # Rejected rows: split the batch so the good rows still go through
+            if len(rows) > 1:
+                mid = len(rows) // 2
+                return self._write_batch(rows[:mid]) + self._write_batch(rows[mid:])
+            print(f"Notification dropped for user {rows[0]['user_id']!r}: {e}")
+            return []
+        except Exception as e:
+            print(f"Notification write failed, retrying {len(rows)} rows: {e}")
+            return rows
+
+    def write(self, rows: list) -> list:
+        """Write rows in batches; returns rows to retry (transient failures)."""
+        failed = []
+        for i in range(0, len(rows), self.batch_size):
+            failed.extend(self._write_batch(rows[i:i + self.batch_size]))
+        return failed
+
+    def tick(self, now: float = None) -> int:
+        """Advance to `now` and write due notifications. Returns rows no longer pending."""
+        rows = self.due_rows(now)
+        failed = self.write(rows)
+        self.retry.extend(failed)
+        return len(rows) - len(failed)
+
+    async def run(self, interval: float = 1.0):
+        """Background loop for the FastAPI server.
+
+        The wheel is only touched on the event loop; store writes run in a thread.
+        """
+        while True:
+            try:
+                rows = self.due_rows()
+                if rows:
+                    self.retry.extend(await asyncio.to_thread(self.write, rows))
+            except Exception as e:
+                print(f"Notification scheduler error: {e}")
+            await asyncio.sleep(interval)
@@ -11,12 +11,27 @@ This approach:
 import os
 import json
 import re
-from datetime import datetime
-from fastapi import FastAPI, HTTPException
+import secrets
+import uuid
+import asyncio
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from fastapi import FastAPI, HTTPException, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from analytics import analyze_timeline, weekday_stress
+from scheduler import NotificationScheduler, default_store
+from history import append_node, walk_history
+from planner import MindPlanner, PatchError, PlanConflict, default_affirmation, week_start_for
+from profiler import ProfileMiddleware, RequestProfiler
+from sharding import HashRing
+from responses import (
+    FastJSONResponse, ResponseCache, cached_walker_response, make_etag, walker_response
+)
+
 # Note: JacLang files (main.jac, models.jac, walkers.jac, agents.jac) 
 # define the OSP graph structure and agent concepts
 # This server implements those patterns using Python/FastAPI
@@ -106,7 +121,8 @@ MODEL = GROQ_MODEL
 app = FastAPI(
     title="SerenityAI API",
     description="Mental Wellness Companion - Hybrid JacLang + FastAPI Backend",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS for frontend - explicitly allow production domains
@@ -126,6 +142,25 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# =====================================================
+# REQUEST PROFILING (admin only)
+# =====================================================
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+request_profiler = RequestProfiler(
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    token=os.getenv("PROFILE_TOKEN") or ADMIN_TOKEN
+)
+
+# Sample walker requests sent with X-Profile or in the sampled fraction
+app.add_middleware(ProfileMiddleware, profiler=request_profiler)
+
+def require_admin(token: str):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints disabled (no ADMIN_TOKEN)")
+    if not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 # =====================================================
 # REQUEST MODELS (match Walker has fields)
 # =====================================================
@@ -156,6 +191,60 @@ class MindCoachRequest(BaseModel):
     last_break_minutes: int = 60
     is_working: bool = True
 
+class ReminderRequest(BaseModel):
+    user_id: str = ""
+    title: str = ""
+    message: str = ""
+    event_at: str = ""  # ISO datetime; naive values use the user's timezone
+    type: str = "reminder"
+    action_url: str = ""
+    reminder_id: str = ""
+
+class MindPlannerRequest(BaseModel):
+    user_id: str = ""
+    week_start: str = ""  # ISO Monday; empty = current week
+    schedule: dict = {}  # schedule_data fields to set (occupation, workDays, ...)
+    patches: list = []  # JSON patch ops against {schedule_data, plan_data}
+    base_version: int = 0  # plan version the patches were made against
+    include_plan: bool = False  # return the full plan, not just patches
+    reset_days: list[str] = []  # edited days to regenerate (discards the edits)
+
+class ShardExportRequest(BaseModel):
+    nodes: list = []  # hash ring members after rebalancing
+    replicas: int = 128
+
+class ShardImportRequest(BaseModel):
+    users: dict = {}  # user_id -> state from /internal/shard/export
+
+class ShardReleaseRequest(BaseModel):
+    user_ids: list[str] = []  # users from /internal/shard/export to release or resume
+
+class ProfileConfigRequest(BaseModel):
+    sample_rate: float = 0.0  # fraction of walker requests to profile (0-1)
+
+class HistoryRequest(BaseModel):
+    user_id: str = ""
+    limit: int = 50
+    cursor: str = ""  # next_cursor from the previous page
+    since_version: int = 0  # delta sync: only entries newer than this version
+    since: str = ""  # delta sync: only entries created after this ISO timestamp
+    fields: list[str] = []  # projection; empty = all fields
+    encoding: str = "objects"  # objects | columnar
+
+class CancelReminderRequest(BaseModel):
+    user_id: str = ""
+    reminder_id: str = ""
+
+class NotificationSettingsRequest(BaseModel):
+    user_id: str = ""
+    reminders_enabled: bool = True
+    achievements_enabled: bool = True
+    tips_enabled: bool = True
+    reminder_minutes: int = 5
+    quiet_start: str = "22:00"
+    quiet_end: str = "07:00"
+    timezone: str = "UTC"
+
 # =====================================================
 # IN-MEMORY GRAPH (simulates OSP Graph)
 # =====================================================
@@ -169,10 +258,31 @@ def get_user_graph(user_id: str) -> dict:
         user_graphs[user_id] = {
             "emotions": [],
             "suggestions": [],
-            "journal_entries": []
+            "journal_entries": [],
+            "id": uuid.uuid4().hex,  # creation id; travels with the graph on shard handoff
+            "version": 0  # bumped on every node append (delta sync)
         }
     return user_graphs[user_id]
 
+# =====================================================
+# NOTIFICATION SCHEDULER (timing wheel)
+# =====================================================
+
+notification_scheduler = NotificationScheduler(store=default_store())
+
+# Keep a strong reference: the event loop only holds tasks weakly
+notification_task = None
+
+@app.on_event("startup")
+async def start_notification_scheduler():
+    global notification_task
+    notification_task = asyncio.create_task(notification_scheduler.run())
+
+@app.on_event("shutdown")
+async def stop_notification_scheduler():
+    if notification_task is not None:
+        notification_task.cancel()
+
 # =====================================================
 # byLLM AGENT FUNCTIONS (Groq implementation)
 # =====================================================
@@ -225,15 +335,19 @@ Text: {text}"""}
         print(f"Groq error: {e}")
         return {"emotion": "neutral", "intensity": 5, "triggers": [], "sentiment": "neutral"}
 
-def detect_patterns(mood_history: list) -> dict:
-    """Detect patterns in mood history - Analytical Agent."""
+def detect_patterns(mood_history: list) -> tuple:
+    """Detect patterns in mood history - Analytical Agent.
+    
+    Returns (patterns, degraded); degraded is True when the LLM call failed
+    and generic patterns were returned instead.
+    """
     if not client or not mood_history:
         return {
             "recurring_emotions": ["neutral"],
             "trigger_correlations": {},
             "weekly_trend": "stable",
             "recommendations": ["Log moods daily", "Try breathing exercises", "Journal before bed"]
-        }
+        }, False
     
     try:
         response = client.chat.completions.create(
@@ -251,7 +365,7 @@ History: {json.dumps(mood_history[:10])}"""}
         content = response.choices[0].message.content
         json_match = re.search(r'\{[\s\S]*\}', content)
         if json_match:
-            return json.loads(json_match.group())
+            return json.loads(json_match.group()), False
     except Exception as e:
         print(f"Groq error: {e}")
     
@@ -260,7 +374,7 @@ History: {json.dumps(mood_history[:10])}"""}
         "trigger_correlations": {},
         "weekly_trend": "stable",
         "recommendations": ["Practice gratitude", "Take short walks", "Stay hydrated"]
-    }
+    }, True
 
 def generate_prompt(current_mood: str, recent_triggers: list) -> str:
     """Generate dynamic, mood-specific mindfulness prompts - Generative Agent.
@@ -410,6 +524,26 @@ def create_breathing_exercise(stress_level: int) -> dict:
         "benefits": "Reduces stress and anxiety"
     }
 
+def plan_affirmation(day: str, stress: int) -> str:
+    """Short daily affirmation for the MindPlanner - Generative Agent."""
+    if not client:
+        return default_affirmation(day, stress)
+    
+    try:
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": "You write short, warm wellness affirmations. Reply with the affirmation only."},
+                {"role": "user", "content": f"Write a one-sentence first-person affirmation for {day}, expected stress level {stress}/10."}
+            ],
+            temperature=0.8,
+            max_tokens=40
+        )
+        return response.choices[0].message.content.strip().strip('"')
+    except Exception as e:
+        print(f"Groq error: {e}")
+        return default_affirmation(day, stress)
+
 def mind_coach(current_mood: str, current_hour: int, last_break_minutes: int, is_working: bool) -> dict:
     """Mind Coach - Empathetic productivity coaching that respects mental state.
     
@@ -618,6 +752,12 @@ Your response should be 2-3 sentences max. Be specific, not generic. Make them f
     }
 
 
+# Weekly plans, cached per (user_id, week_start)
+mind_planner = MindPlanner(affirm=plan_affirmation)
+
+# Encoded read-walker responses, keyed by ETag (graph version + params)
+response_cache = ResponseCache()
+
 # =====================================================
 # WALKER ENDPOINTS (match Jac walker names)
 # =====================================================
@@ -627,15 +767,15 @@ async def health():
     return {"status": "healthy", "service": "SerenityAI Backend", "version": "1.0.0"}
 
 @app.post("/walker/HealthCheck")
-async def walker_health_check():
+async def walker_health_check(http_request: Request):
     """HealthCheck walker."""
-    return {
-        "result": {},
-        "reports": [{"status": "healthy", "service": "SerenityAI Backend", "version": "1.0.0"}]
-    }
+    return walker_response(
+        {"status": "healthy", "service": "SerenityAI Backend", "version": "1.0.0"},
+        http_request.headers
+    )
 
 @app.post("/walker/MoodLogger")
-async def walker_mood_logger(request: MoodLogRequest):
+async def walker_mood_logger(request: MoodLogRequest, http_request: Request):
     """MoodLogger walker - logs mood and returns AI response."""
     try:
         # Classify mood (Analytical Agent)
@@ -649,6 +789,9 @@ async def walker_mood_logger(request: MoodLogRequest):
         emotion_name = analysis.get("emotion", "neutral")
         emotion_color = colors.get(emotion_name, "#808080")
         intensity = analysis.get("intensity", 5)
+        triggers = analysis.get("triggers")
+        if not isinstance(triggers, list):
+            triggers = []
         
         # Create emotion node in graph (OSP concept)
         graph = get_user_graph(request.user_id)
@@ -657,47 +800,57 @@ async def walker_mood_logger(request: MoodLogRequest):
             "intensity": intensity,
             "timestamp": datetime.now().isoformat(),
             "color": emotion_color,
-            "note": request.mood_text
+            "note": request.mood_text,
+            "triggers": triggers
         }
-        graph["emotions"].append(emotion_node)
+        append_node(graph, "emotions", emotion_node)
         
         # Generate response (Generative Agent)
         response = empathy_response(emotion_name, intensity, request.mood_text)
         
-        return {
-            "result": {},
-            "reports": [{
-                "analysis": analysis,
-                "response": response,
-                "emotion": {"name": emotion_name, "intensity": intensity, "color": emotion_color}
-            }]
-        }
+        return walker_response({
+            "analysis": analysis,
+            "response": response,
+            "emotion": {"name": emotion_name, "intensity": intensity, "color": emotion_color}
+        }, http_request.headers)
     except Exception as e:
         print(f"MoodLogger error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/walker/TrendAnalyzer")
-async def walker_trend_analyzer(request: TrendRequest):
+async def walker_trend_analyzer(request: TrendRequest, http_request: Request):
     """TrendAnalyzer walker - analyzes mood patterns."""
-    try:
-        # Get mood history from graph (OSP traversal)
-        graph = get_user_graph(request.user_id)
+    # Get mood history from graph (OSP traversal)
+    graph = get_user_graph(request.user_id)
+    # The window rolls with the clock; key on the first entry still inside it
+    since = (datetime.now() - timedelta(days=request.days)).isoformat()
+    start = bisect_left(graph["emotions"], since, key=lambda e: e["timestamp"])
+    etag = make_etag("TrendAnalyzer", graph, request.user_id, request.days, start)
+    
+    def analyze() -> tuple:
+        emotions = graph["emotions"][start:]
         mood_history = [{"emotion": e["name"], "intensity": e["intensity"], "timestamp": e["timestamp"]} 
-                       for e in graph["emotions"]]
+                       for e in emotions]
+        
+        # Deterministic correlations/influences (vectorized analytics)
+        analytics = analyze_timeline(emotions)
         
         # Detect patterns (Analytical Agent)
-        patterns = detect_patterns(mood_history)
+        patterns, degraded = detect_patterns(mood_history)
+        # Always the computed {trigger: {emotion, share, count}} shape, never the LLM's guess
+        patterns["trigger_correlations"] = analytics["trigger_correlations"]
         
-        return {
-            "result": {},
-            "reports": [{"patterns": patterns}]
-        }
+        # Don't keep serving an LLM outage's generic patterns from the cache
+        return {"patterns": patterns, "analytics": analytics}, not degraded
+    
+    try:
+        return cached_walker_response(response_cache, etag, http_request.headers, analyze)
     except Exception as e:
         print(f"TrendAnalyzer error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/walker/SuggestionGenerator")
-async def walker_suggestion_generator(request: SuggestionRequest):
+async def walker_suggestion_generator(request: SuggestionRequest, http_request: Request):
     """SuggestionGenerator walker - generates personalized suggestions."""
     try:
         # Get recent triggers (OSP traversal)
@@ -716,22 +869,19 @@ async def walker_suggestion_generator(request: SuggestionRequest):
             exercise = create_breathing_exercise(request.stress_level)
         
         # Store suggestion in graph
-        graph["suggestions"].append({
+        append_node(graph, "suggestions", {
             "content": prompt,
             "type": "journal_prompt",
             "timestamp": datetime.now().isoformat()
         })
         
-        return {
-            "result": {},
-            "reports": [{"prompt": prompt, "exercise": exercise}]
-        }
+        return walker_response({"prompt": prompt, "exercise": exercise}, http_request.headers)
     except Exception as e:
         print(f"SuggestionGenerator error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/walker/JournalSaver")
-async def walker_journal_saver(request: JournalRequest):
+async def walker_journal_saver(request: JournalRequest, http_request: Request):
     """JournalSaver walker - saves journal entry with AI insight."""
     try:
         # Analyze journal (Analytical Agent)
@@ -754,16 +904,13 @@ async def walker_journal_saver(request: JournalRequest):
             "mood_after": mood_after,
             "ai_insight": response
         }
-        graph["journal_entries"].append(journal_node)
+        append_node(graph, "journal_entries", journal_node)
         
-        return {
-            "result": {},
-            "reports": [{
-                "entry_id": str(len(graph["journal_entries"])),
-                "mood_change": mood_after - request.mood_before,
-                "response": response
-            }]
-        }
+        return walker_response({
+            "entry_id": str(len(graph["journal_entries"])),
+            "mood_change": mood_after - request.mood_before,
+            "response": response
+        }, http_request.headers)
     except Exception as e:
         print(f"JournalSaver error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -771,27 +918,241 @@ async def walker_journal_saver(request: JournalRequest):
 # List walkers (for compatibility)
 @app.get("/walkers")
 async def list_walkers():
-    return {"walkers": ["HealthCheck", "MoodLogger", "TrendAnalyzer", "SuggestionGenerator", "JournalSaver", "MindCoach"]}
+    return {"walkers": ["HealthCheck", "MoodLogger", "TrendAnalyzer", "SuggestionGenerator", "JournalSaver", "MindCoach",
+                        "ReminderScheduler", "ReminderCanceller", "NotificationSettings",
+                        "MoodHistory", "JournalHistory", "MindPlanner"]}
 
 @app.post("/walker/MindCoach")
-async def walker_mind_coach(request: MindCoachRequest):
+async def walker_mind_coach(request: MindCoachRequest, http_request: Request):
     """MindCoach walker - productivity coaching with mental state awareness."""
     try:
-        result = mind_coach(
+        # Tips are randomized on purpose, so MindCoach is never cached
+        return walker_response(mind_coach(
             current_mood=request.current_mood,
             current_hour=request.current_hour,
             last_break_minutes=request.last_break_minutes,
             is_working=request.is_working
-        )
-        
-        return {
-            "result": {},
-            "reports": [result]
-        }
+        ), http_request.headers)
     except Exception as e:
         print(f"MindCoach error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/walker/MindPlanner")
+async def walker_mind_planner(request: MindPlannerRequest, http_request: Request):
+    """MindPlanner walker - cached weekly plan with incremental patches."""
+    try:
+        week_start = week_start_for(date.fromisoformat(request.week_start) if request.week_start else None)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="week_start must be an ISO date")
+    # Regenerate only the days whose schedule or mood inputs changed
+    graph = get_user_graph(request.user_id)
+    since = (datetime.now() - timedelta(days=28)).isoformat()
+    mood_stress = weekday_stress([e for e in graph["emotions"] if e["timestamp"] >= since])
+    try:
+        # Regenerated days call the LLM (blocking), so keep it off the event loop
+        plan, patches, regenerated, kept = await asyncio.to_thread(
+            mind_planner.update,
+            request.user_id,
+            week_start,
+            request.patches,
+            request.base_version,
+            request.schedule or None,
+            mood_stress,
+            request.reset_days
+        )
+    except PlanConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    report = {
+        "week_start": week_start,
+        "version": plan["version"],
+        "patches": patches,
+        "regenerated_days": regenerated,
+        "kept_days": kept  # edited days whose inputs changed; send reset_days to regenerate
+    }
+    if request.include_plan:
+        report["schedule_data"] = plan["schedule_data"]
+        report["plan_data"] = plan["plan_data"]
+    
+    return walker_response(report, http_request.headers)
+
+def history_report(request: HistoryRequest, http_request: Request, store: str):
+    """Shared body of the history walkers (cursor paging + delta sync)."""
+    graph = get_user_graph(request.user_id)
+    etag = make_etag(
+        store, graph, request.user_id, request.limit, request.cursor,
+        request.since_version, request.since, ",".join(request.fields), request.encoding
+    )
+    
+    def page() -> tuple:
+        return walk_history(
+            graph,
+            store,
+            limit=request.limit,
+            cursor=request.cursor,
+            since_version=request.since_version,
+            since=request.since,
+            fields=request.fields,
+            encoding=request.encoding
+        ), True
+    
+    try:
+        return cached_walker_response(response_cache, etag, http_request.headers, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/walker/MoodHistory")
+async def walker_mood_history(request: HistoryRequest, http_request: Request):
+    """MoodHistory walker - paginated / delta-synced emotion timeline."""
+    return history_report(request, http_request, "emotions")
+
+@app.post("/walker/JournalHistory")
+async def walker_journal_history(request: HistoryRequest, http_request: Request):
+    """JournalHistory walker - paginated / delta-synced journal entries."""
+    return history_report(request, http_request, "journal_entries")
+
+@app.post("/walker/ReminderScheduler")
+async def walker_reminder_scheduler(request: ReminderRequest, http_request: Request):
+    """ReminderScheduler walker - schedules a backend notification."""
+    try:
+        event_at = datetime.fromisoformat(request.event_at)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="event_at must be an ISO datetime")
+    if request.type not in ("reminder", "achievement", "tip", "insight"):
+        raise HTTPException(status_code=400, detail=f"Unknown notification type: {request.type}")
+    
+    try:
+        reminder_id, due_at = notification_scheduler.schedule(
+            request.user_id,
+            request.title,
+            request.message,
+            event_at,
+            type=request.type,
+            action_url=request.action_url or None,
+            reminder_id=request.reminder_id or None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return walker_response({"reminder_id": reminder_id, "due_at": due_at.isoformat()}, http_request.headers)
+
+@app.post("/walker/ReminderCanceller")
+async def walker_reminder_canceller(request: CancelReminderRequest, http_request: Request):
+    """ReminderCanceller walker - cancels a pending notification."""
+    return walker_response(
+        {"cancelled": notification_scheduler.cancel(request.reminder_id, request.user_id)},
+        http_request.headers
+    )
+
+@app.post("/walker/NotificationSettings")
+async def walker_notification_settings(request: NotificationSettingsRequest, http_request: Request):
+    """NotificationSettings walker - syncs a user's notification_settings row."""
+    try:
+        settings = notification_scheduler.update_settings(
+            request.user_id, **request.dict(exclude={"user_id"})
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return walker_response({"settings": settings.__dict__}, http_request.headers)
+
+# =====================================================
+# SHARD HANDOFF (sharded mode, see sharding.py)
+# =====================================================
+
+SHARD_ID = os.getenv("SHARD_ID", "")
+SHARD_TOKEN = os.getenv("SHARD_TOKEN")
+
+def require_shard_token(token: str):
+    if not SHARD_TOKEN or not secrets.compare_digest(token.encode(), SHARD_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Not running as a shard")
+
+@app.post("/internal/shard/export")
+async def shard_export(request: ShardExportRequest, x_shard_token: str = Header(default="")):
+    """Return every user this shard no longer owns under the new ring.
+    
+    The users stay here until /internal/shard/release, so a failed import
+    loses nothing; their reminders are held meanwhile so none fires twice.
+    """
+    require_shard_token(x_shard_token)
+    ring = HashRing(request.nodes, request.replicas)
+    known = set(user_graphs) | {user_id for user_id, _ in mind_planner.plans} | set(notification_scheduler.settings)
+    known |= {r.user_id for r in notification_scheduler.wheel.index.values()}
+    moving = {user_id for user_id in known if ring.owner(user_id) != SHARD_ID}
+    
+    plans = mind_planner.export_users(moving)
+    notifications = notification_scheduler.export_users(moving)
+    users = {
+        user_id: {
+            "graph": user_graphs.get(user_id),
+            "plans": plans[user_id],
+            "notifications": notifications[user_id]
+        }
+        for user_id in moving
+    }
+    return {"shard": SHARD_ID, "users": users}
+
+@app.post("/internal/shard/import")
+async def shard_import(request: ShardImportRequest, x_shard_token: str = Header(default="")):
+    """Take ownership of users handed over by another shard."""
+    require_shard_token(x_shard_token)
+    for user_id, state in request.users.items():
+        if state.get("graph") is not None:
+            user_graphs[user_id] = state["graph"]
+        mind_planner.load_user(user_id, state.get("plans", {}))
+        notification_scheduler.load_user(user_id, state.get("notifications", {}))
+    return {"shard": SHARD_ID, "imported": len(request.users)}
+
+@app.post("/internal/shard/release")
+async def shard_release(request: ShardReleaseRequest, x_shard_token: str = Header(default="")):
+    """Drop exported users once their new owner has imported them."""
+    require_shard_token(x_shard_token)
+    user_ids = set(request.user_ids)
+    mind_planner.export_users(user_ids, remove=True)
+    notification_scheduler.export_users(user_ids, remove=True)
+    for user_id in user_ids:
+        user_graphs.pop(user_id, None)
+    return {"shard": SHARD_ID, "released": len(user_ids)}
+
+@app.post("/internal/shard/resume")
+async def shard_resume(request: ShardReleaseRequest, x_shard_token: str = Header(default="")):
+    """Keep exported users after a failed handoff (their reminders fire here again)."""
+    require_shard_token(x_shard_token)
+    notification_scheduler.resume_users(set(request.user_ids))
+    return {"shard": SHARD_ID, "resumed": len(request.user_ids)}
+
+# =====================================================
+# ADMIN: PROFILES
+# =====================================================
+
+@app.get("/admin/profiles")
+async def admin_profiles(x_admin_token: str = Header(default="")):
+    """Per-walker profile summary (latency and hottest frames)."""
+    require_admin(x_admin_token)
+    return request_profiler.summary()
+
+@app.get("/admin/profiles/collapsed", response_class=PlainTextResponse)
+async def admin_profiles_collapsed(walker: str = None, x_admin_token: str = Header(default="")):
+    """Collapsed stacks for flamegraph.pl / speedscope."""
+    require_admin(x_admin_token)
+    return request_profiler.collapsed(walker)
+
+@app.post("/admin/profiles/config")
+async def admin_profiles_config(request: ProfileConfigRequest, x_admin_token: str = Header(default="")):
+    """Change the sampled fraction of walker traffic at runtime."""
+    require_admin(x_admin_token)
+    request_profiler.sample_rate = min(max(request.sample_rate, 0.0), 1.0)
+    return {"sample_rate": request_profiler.sample_rate}
+
+@app.delete("/admin/profiles")
+async def admin_profiles_reset(x_admin_token: str = Header(default="")):
+    """Clear collected profiles."""
+    require_admin(x_admin_token)
+    request_profiler.reset()
+    return {"status": "cleared"}
+
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting SerenityAI Hybrid Backend")
@@ -0,0 +1,344 @@
+"""
+SerenityAI Sharded Mode
+Multi-core scale-out with user-sharded worker processes
+
+All user state (graphs, plans, reminders) lives in each process's memory,
+so instead of sharing it we partition it:
+- N worker processes each run server.py and own a consistent-hash
+  partition of user_ids (shared-nothing)
+- A router process forwards every walker request to the shard that owns
+  the request's user_id
+- Adding a worker moves only ~1/(N+1) of users: the router pauses
+  traffic, each shard exports the users it no longer owns, the new
+  shard imports them and only then do the sources release them
+- Profiles live in each shard's process, so /admin/profiles* calls are
+  sent to every shard
+
+Run with: python sharding.py --workers 4 --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import subprocess
+import sys
+from bisect import bisect
+from collections import Counter
+from hashlib import blake2b
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
+
+# Headers that must not be copied between hops
+HOP_HEADERS = {"host", "content-length", "connection", "keep-alive", "transfer-encoding", "upgrade"}
+
+
+# =====================================================
+# CONSISTENT HASH RING
+# =====================================================
+
+class HashRing:
+    """Consistent hashing with virtual nodes."""
+
+    def __init__(self, nodes=(), replicas: int = 128):
+        self.replicas = replicas
+        self.nodes = []
+        self._keys = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def _rebuild(self):
+        points = sorted((self._hash(f"{node}#{i}"), node) for node in self.nodes for i in range(self.replicas))
+        self._keys = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def add(self, node: str):
+        if node not in self.nodes:
+            self.nodes.append(node)
+            self._rebuild()
+
+    def remove(self, node: str):
+        if node in self.nodes:
+            self.nodes.remove(node)
+            self._rebuild()
+
+    def owner(self, key: str) -> str:
+        if not self._keys:
+            raise LookupError("Hash ring is empty")
+        return self._owners[bisect(self._keys, self._hash(key)) % len(self._keys)]
+
+
+# =====================================================
+# CLUSTER (worker processes + routing)
+# =====================================================
+
+class ShardCluster:
+    """Starts shard workers and routes requests to them."""
+
+    def __init__(self, host: str = "127.0.0.1", base_port: int = 8100, app: str = "server:app",
+                 replicas: int = 128, token: str = None):
+        self.host = host
+        self.base_port = base_port
+        self.app = app
+        self.token = token or secrets.token_hex(16)
+        self.ring = HashRing(replicas=replicas)
+        self.workers = {}  # node_id -> {"url", "process"}
+        self.client = None
+        self.ready = asyncio.Event()
+        self.inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._rebalance = asyncio.Lock()
+
+    def _spawn(self, index: int) -> tuple:
+        node_id, port = f"shard-{index}", self.base_port + index
+        env = {**os.environ, "SHARD_ID": node_id, "SHARD_TOKEN": self.token}
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app, "--host", self.host,
+             "--port", str(port), "--log-level", "warning"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+        )
+        return node_id, {"url": f"http://{self.host}:{port}", "process": process}
+
+    async def _wait_healthy(self, url: str, timeout: float = 30.0):
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                if (await self.client.get(f"{url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if asyncio.get_running_loop().time() > deadline:
+                raise RuntimeError(f"Shard at {url} did not become healthy")
+            await asyncio.sleep(0.2)
+
+    async def start(self, workers: int):
+        self.client = httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=None))
+        spawned = dict(self._spawn(i) for i in range(workers))
+        self.workers.update(spawned)
+        await asyncio.gather(*(self._wait_healthy(w["url"]) for w in spawned.values()))
+        for node_id in spawned:
+            self.ring.add(node_id)
+        self.ready.set()
+        print(f"🧩 {workers} shard workers ready")
+
+    async def stop(self):
+        for worker in self.workers.values():
+            worker["process"].terminate()
+        for worker in self.workers.values():
+            worker["process"].wait()
+        if self.client:
+            await self.client.aclose()
+
+    async def add_worker(self) -> dict:
+        """Start one more shard and move the users it now owns onto it.
+
+        Sources keep their copy until every import succeeded; if an import
+        fails the new shard is dropped and routing continues on the old ring.
+        """
+        async with self._rebalance:
+            node_id, worker = self._spawn(len(self.workers))
+            try:
+                await self._wait_healthy(worker["url"])
+            except RuntimeError:
+                worker["process"].terminate()
+                worker["process"].wait()
+                raise
+
+            # Pause routing and let in-flight requests finish
+            self.ready.clear()
+            try:
+                await self._idle.wait()
+                ring = HashRing(self.ring.nodes + [node_id], self.ring.replicas)
+                urls = {**{n: w["url"] for n, w in self.workers.items()}, node_id: worker["url"]}
+                headers = {"X-Shard-Token": self.token}
+                spec = {"nodes": ring.nodes, "replicas": ring.replicas}
+
+                exported, by_owner = {}, {}
+                try:
+                    for source_id in self.workers:
+                        users = (await self.client.post(
+                            f"{urls[source_id]}/internal/shard/export", json=spec, headers=headers
+                        )).raise_for_status().json()["users"]
+                        exported[source_id] = list(users)
+                        for user_id, state in users.items():
+                            by_owner.setdefault(ring.owner(user_id), {})[user_id] = state
+                    for owner_id, users in by_owner.items():
+                        (await self.client.post(
+                            f"{urls[owner_id]}/internal/shard/import", json={"users": users}, headers=headers
+                        )).raise_for_status()
+                except Exception:
+                    # Nothing was released yet, so the sources still hold every user
+                    worker["process"].terminate()
+                    worker["process"].wait()
+                    for source_id, user_ids in exported.items():
+                        if user_ids:
+                            try:
+                                await self.client.post(f"{urls[source_id]}/internal/shard/resume",
+                                                       json={"user_ids": user_ids}, headers=headers)
+                            except httpx.HTTPError as e:
+                                print(f"⚠️ Could not resume reminders on {source_id}: {e}")
+                    raise
+
+                self.workers[node_id] = worker
+                self.ring = ring
+                for source_id, user_ids in exported.items():
+                    if user_ids:
+                        (await self.client.post(
+                            f"{urls[source_id]}/internal/shard/release", json={"user_ids": user_ids}, headers=headers
+                        )).raise_for_status()
+            finally:
+                self.ready.set()
+            moved = sum(len(user_ids) for user_ids in exported.values())
+            return {"added": node_id, "moved_users": moved, "workers": len(self.workers)}
+
+    def node_for(self, user_id: str) -> str:
+        return self.ring.owner(user_id)
+
+    async def broadcast(self, request: Request) -> dict:
+        """Send the request to every shard; returns {node_id: httpx.Response}."""
+        await self.ready.wait()
+        self.inflight += 1
+        self._idle.clear()
+        try:
+            body = await request.body()
+            headers = [(k, v) for k, v in request.headers.items()
+                       if k.lower() not in HOP_HEADERS and k.lower() != "accept-encoding"]
+            node_ids = list(self.ring.nodes)
+            replies = await asyncio.gather(*(self.client.request(
+                request.method,
+                self.workers[node_id]["url"] + request.url.path,
+                params=request.query_params,
+                content=body,
+                headers=headers,
+            ) for node_id in node_ids))
+        finally:
+            self.inflight -= 1
+            if self.inflight == 0:
+                self._idle.set()
+        return dict(zip(node_ids, replies))
+
+    async def forward(self, request: Request) -> Response:
+        await self.ready.wait()
+        # Count the request before any await so a rebalance can drain it
+        self.inflight += 1
+        self._idle.clear()
+        try:
+            body = await request.body()
+
+            # Walkers carry user_id in the JSON body; everything else goes to the first shard
+            node_id = self.ring.nodes[0]
+            if request.method == "POST" and request.url.path.startswith("/walker/"):
+                try:
+                    user_id = json.loads(body or b"{}").get("user_id", "")
+                except (ValueError, AttributeError):
+                    user_id = ""
+                node_id = self.node_for(str(user_id))
+
+            upstream = await self.client.send(self.client.build_request(
+                request.method,
+                self.workers[node_id]["url"] + request.url.path,
+                params=request.query_params,
+                content=body,
+                headers=[(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS],
+            ), stream=True)
+            # Raw bytes: keep the shard's gzip/brotli encoding intact
+            content = b"".join([chunk async for chunk in upstream.aiter_raw()])
+            await upstream.aclose()
+        finally:
+            self.inflight -= 1
+            if self.inflight == 0:
+                self._idle.set()
+
+        headers = {k: v for k, v in upstream.headers.items() if k.lower() not in HOP_HEADERS}
+        headers["X-Shard"] = node_id
+        return Response(content=content, status_code=upstream.status_code, headers=headers)
+
+
+def create_router(cluster: ShardCluster, workers: int) -> FastAPI:
+    """FastAPI front process that routes every request to its shard."""
+    router = FastAPI(title="SerenityAI Shard Router")
+    admin_token = os.getenv("ADMIN_TOKEN")
+
+    @router.on_event("startup")
+    async def start_cluster():
+        await cluster.start(workers)
+
+    @router.on_event("shutdown")
+    async def stop_cluster():
+        await cluster.stop()
+
+    @router.get("/cluster")
+    async def cluster_status():
+        return {
+            "workers": {node_id: w["url"] for node_id, w in cluster.workers.items()},
+            "inflight": cluster.inflight,
+        }
+
+    @router.post("/cluster/workers")
+    async def cluster_add_worker(x_admin_token: str = Header(default="")):
+        if not admin_token or not secrets.compare_digest(x_admin_token.encode(), admin_token.encode()):
+            raise HTTPException(status_code=403, detail="Admin token required")
+        return await cluster.add_worker()
+
+    def first_error(replies: dict):
+        for reply in replies.values():
+            if reply.status_code >= 400:
+                return Response(content=reply.content, status_code=reply.status_code,
+                                media_type=reply.headers.get("content-type"))
+        return None
+
+    @router.get("/admin/profiles/collapsed")
+    async def cluster_profiles_collapsed(request: Request):
+        """Collapsed stacks merged across shards (counts are summed)."""
+        replies = await cluster.broadcast(request)
+        error = first_error(replies)
+        if error:
+            return error
+        stacks = Counter()
+        for reply in replies.values():
+            for line in reply.text.splitlines():
+                stack, _, count = line.rpartition(" ")
+                if stack:
+                    stacks[stack] += int(count)
+        return PlainTextResponse("\n".join(f"{stack} {count}" for stack, count in stacks.most_common()))
+
+    @router.api_route("/admin/profiles", methods=["GET", "DELETE"])
+    @router.post("/admin/profiles/config")
+    async def cluster_profiles(request: Request):
+        """Profile summary, reset and sample rate apply to every shard."""
+        replies = await cluster.broadcast(request)
+        return first_error(replies) or {"shards": {node_id: reply.json() for node_id, reply in replies.items()}}
+
+    @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+    async def route(request: Request, path: str):
+        # Shard handoff endpoints are only for the cluster itself
+        if path.startswith("internal/"):
+            raise HTTPException(status_code=404, detail="Not Found")
+        return await cluster.forward(request)
+
+    return router
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run SerenityAI as user-sharded worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--base-port", type=int, default=8100, help="first port used by shard workers")
+    args = parser.parse_args()
+
+    print(f"🚀 Starting SerenityAI router on :{args.port} with {args.workers} shards")
+    cluster = ShardCluster(base_port=args.base_port, token=os.getenv("SHARD_TOKEN"))
+    uvicorn.run(create_router(cluster, args.workers), host=args.host, port=args.port)
@@ -27,9 +27,15 @@ export interface MoodLoggerResponse {
   };
 }
 
+export interface TriggerCorrelation {
+  emotion: string;
+  share: number;
+  count: number;
+}
+
 export interface TrendPatterns {
   recurring_emotions: string[];
-  trigger_correlations: Record<string, string>;
+  trigger_correlations: Record<string, TriggerCorrelation>;
   weekly_trend: 'improving' | 'declining' | 'stable';
   recommendations: string[];
 }
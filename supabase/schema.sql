@@ -117,10 +117,14 @@ CREATE TABLE IF NOT EXISTS notification_settings (
   reminder_minutes INTEGER DEFAULT 5,
   quiet_start TIME DEFAULT '22:00',
   quiet_end TIME DEFAULT '07:00',
+  timezone TEXT DEFAULT 'UTC',
   created_at TIMESTAMPTZ DEFAULT NOW(),
   updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- IANA time zone used by the backend scheduler for quiet hours
+ALTER TABLE notification_settings ADD COLUMN IF NOT EXISTS timezone TEXT DEFAULT 'UTC';
+
 -- RLS Policies
 ALTER TABLE notification_settings ENABLE ROW LEVEL SECURITY;
 